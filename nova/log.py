@@ -29,8 +29,6 @@ It also allows setting of formatting information through flags.
 
 """
 
-import cStringIO
-import inspect
 import json
 import logging
 import logging.handlers
@@ -39,6 +37,9 @@ import stat
 import sys
 import traceback
 
+from eventlet import greenthread
+from eventlet import hubs
+
 import nova
 from nova import flags
 from nova import local
@@ -82,9 +83,27 @@ log_opts = [
     cfg.BoolOpt('publish_errors',
                 default=False,
                 help='publish error events'),
+    cfg.IntOpt('publish_errors_batch_size',
+               default=1,
+               help='number of error events to publish together in a single '
+                    'notification, 1 publishes every error on its own'),
+    cfg.FloatOpt('publish_errors_batch_interval',
+                 default=0.5,
+                 help='seconds to wait for more error events before '
+                      'publishing a partial batch'),
     cfg.StrOpt('logfile',
                default=None,
                help='output to named file'),
+    cfg.IntOpt('logfile_buffer_records',
+               default=0,
+               help='number of records to batch up before writing them to '
+                    'the log file, 0 writes every record immediately. '
+                    'ERROR and above are always written immediately'),
+    cfg.FloatOpt('logfile_buffer_interval',
+                 default=1.0,
+                 help='seconds after which batched log file records are '
+                      'written out even if logfile_buffer_records has not '
+                      'been reached'),
     cfg.BoolOpt('use_stderr',
                 default=True,
                 help='log to standard error'),
@@ -129,17 +148,62 @@ AUDIT = logging.INFO + 1
 logging.addLevelName(AUDIT, 'AUDIT')
 
 
+# the version never changes at runtime, so only compute it once
+_NOVA_VERSION = version.version_string_with_vcs()
+
+# extra for records without a context or instance, never modified
+_DEFAULT_EXTRA = {'instance': '', 'nova_version': _NOVA_VERSION}
+
+
 def _dictify_context(context):
-    if context is None:
-        return None
-    if not isinstance(context, dict) \
-    and getattr(context, 'to_dict', None):
-        context = context.to_dict()
+    if context is None or isinstance(context, dict):
+        return context
+    to_dict = getattr(context, 'to_dict', None)
+    if to_dict:
+        return to_dict()
     return context
 
 
 def _get_binary_name():
-    return os.path.basename(inspect.stack()[-1][1])
+    return os.path.basename(sys.argv[0] or 'nova')
+
+
+_LEVEL_NAMES = {
+    'CRITICAL': CRITICAL,
+    'FATAL': FATAL,
+    'ERROR': ERROR,
+    'WARNING': WARNING,
+    'WARN': WARN,
+    'AUDIT': AUDIT,
+    'INFO': INFO,
+    'DEBUG': DEBUG,
+    'NOTSET': NOTSET,
+}
+
+_parsed_levels = None
+
+
+def _get_parsed_levels():
+    """Return FLAGS.default_log_levels as (logger, prefix, level) tuples.
+
+    The parsed result is cached until reset() is called or the flag value
+    changes.
+
+    """
+    global _parsed_levels
+    pairs = tuple(FLAGS.default_log_levels)
+    if _parsed_levels is None or _parsed_levels[0] != pairs:
+        parsed = []
+        for pair in pairs:
+            logger, _sep, level_name = pair.partition('=')
+            parsed.append((logger, logger + '.', _LEVEL_NAMES[level_name]))
+        _parsed_levels = (pairs, tuple(parsed))
+    return _parsed_levels[1]
+
+
+# every NovaLogger ever created, so reset() does not have to pick them out of
+# the logging manager.  Loggers live as long as the process anyway.
+_nova_loggers = []
 
 
 def _get_log_file_path(binary=None):
@@ -150,6 +214,28 @@ def _get_log_file_path(binary=None):
         return '%s.log' % (os.path.join(FLAGS.logdir, binary),)
 
 
+class NovaLogRecord(logging.LogRecord):
+    """A LogRecord that only interpolates its message once.
+
+    Every handler's formatter calls getMessage(), so with several handlers
+    attached the msg % args work would otherwise be repeated for each one.
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        logging.LogRecord.__init__(self, *args, **kwargs)
+        self._message_cache = None
+
+    def getMessage(self):
+        cache = self._message_cache
+        if cache is not None and cache[0] is self.msg \
+        and cache[1] is self.args:
+            return cache[2]
+        message = logging.LogRecord.getMessage(self)
+        self._message_cache = (self.msg, self.args, message)
+        return message
+
+
 class NovaLogger(logging.Logger):
     """NovaLogger manages request context and formatting.
 
@@ -159,91 +245,114 @@ class NovaLogger(logging.Logger):
 
     def __init__(self, name, level=NOTSET):
         logging.Logger.__init__(self, name, level)
+        _nova_loggers.append(self)
         self.setup_from_flags()
 
     def setup_from_flags(self):
         """Setup logger from flags."""
         level = NOTSET
-        for pair in FLAGS.default_log_levels:
-            logger, _sep, level_name = pair.partition('=')
+        name = self.name
+        for logger, prefix, logger_level in _get_parsed_levels():
             # NOTE(todd): if we set a.b, we want a.b.c to have the same level
             #             (but not a.bc, so we check the dot)
-            if self.name == logger or self.name.startswith("%s." % logger):
-                level = globals()[level_name]
+            if name == logger or name.startswith(prefix):
+                level = logger_level
         self.setLevel(level)
 
     def _update_extra(self, params):
-        if 'extra' not in params:
-            params['extra'] = {}
-        extra = params['extra']
-
-        context = None
-        if 'context' in params:
-            context = params['context']
-            del params['context']
+        context = params.pop('context', None)
         if not context:
             context = getattr(local.store, 'context', None)
+        instance = params.pop('instance', None)
+
+        extra = params.get('extra')
+        if extra is None:
+            if not context and instance is None:
+                # nothing specific to this record, the defaults can be shared
+                params['extra'] = _DEFAULT_EXTRA
+                return
+            extra = params['extra'] = {}
+
         if context:
             extra.update(_dictify_context(context))
 
-        if 'instance' in params:
-            extra.update({'instance': (FLAGS.instance_format
-                                       % params['instance'])})
-            del params['instance']
+        if instance is not None:
+            extra['instance'] = FLAGS.instance_format % instance
         else:
-            extra.update({'instance': ''})
+            extra['instance'] = ''
 
-        extra.update({"nova_version": version.version_string_with_vcs()})
+        extra['nova_version'] = _NOVA_VERSION
 
     #NOTE(ameade): The following calls to _log must be maintained as direct
     #calls. _log introspects the call stack to get information such as the
     #filename and line number the logging method was called from.
 
     def log(self, lvl, msg, *args, **kwargs):
+        if not self.isEnabledFor(lvl):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(lvl):
-            self._log(lvl, msg, args, **kwargs)
+        self._log(lvl, msg, args, **kwargs)
 
     def debug(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(DEBUG):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(DEBUG):
-            self._log(DEBUG, msg, args, **kwargs)
+        self._log(DEBUG, msg, args, **kwargs)
 
     def info(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(INFO):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(INFO):
-            self._log(INFO, msg, args, **kwargs)
+        self._log(INFO, msg, args, **kwargs)
 
     def warn(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(WARN):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(WARN):
-            self._log(WARN, msg, args, **kwargs)
+        self._log(WARN, msg, args, **kwargs)
 
     def warning(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(WARNING):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(WARNING):
-            self._log(WARNING, msg, args, **kwargs)
+        self._log(WARNING, msg, args, **kwargs)
 
     def error(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(ERROR):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(ERROR):
-            self._log(ERROR, msg, args, **kwargs)
+        self._log(ERROR, msg, args, **kwargs)
 
     def critical(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(CRITICAL):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(CRITICAL):
-            self._log(CRITICAL, msg, args, **kwargs)
+        self._log(CRITICAL, msg, args, **kwargs)
 
     def fatal(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(FATAL):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(FATAL):
-            self._log(FATAL, msg, args, **kwargs)
+        self._log(FATAL, msg, args, **kwargs)
 
     def audit(self, msg, *args, **kwargs):
         """Shortcut for our AUDIT level."""
+        if not self.isEnabledFor(AUDIT):
+            return
         self._update_extra(kwargs)
-        if self.isEnabledFor(AUDIT):
-            self._log(AUDIT, msg, args, **kwargs)
+        self._log(AUDIT, msg, args, **kwargs)
+
+    def makeRecord(self, name, level, fn, lno, msg, args, exc_info,
+                   func=None, extra=None):
+        """Same as logging.Logger.makeRecord, but builds a NovaLogRecord."""
+        rv = NovaLogRecord(name, level, fn, lno, msg, args, exc_info, func)
+        if extra is not None:
+            for key in extra:
+                if key in ('message', 'asctime') or key in rv.__dict__:
+                    raise KeyError('Attempt to overwrite %r in LogRecord'
+                                   % key)
+                rv.__dict__[key] = extra[key]
+        return rv
 
     def addHandler(self, handler):
         """Each handler gets our custom formatter."""
@@ -261,15 +370,25 @@ class NovaLogger(logging.Logger):
             return
         env = extra.get('environment')
         if env:
-            env = env.copy()
-            for k in env.keys():
-                if not isinstance(env[k], str):
-                    env.pop(k)
+            env = dict((k, v) for k, v in env.iteritems()
+                       if isinstance(v, str))
             message = 'Environment: %s' % json.dumps(env)
             kwargs.pop('exc_info')
             self.error(message, **kwargs)
 
 
+# format strings with the debug suffix appended, keyed by (format, suffix)
+_debug_formats = {}
+
+
+def _get_debug_format(fmt, suffix):
+    key = (fmt, suffix)
+    debug_fmt = _debug_formats.get(key)
+    if debug_fmt is None:
+        debug_fmt = _debug_formats[key] = '%s %s' % key
+    return debug_fmt
+
+
 class NovaFormatter(logging.Formatter):
     """A nova.context.RequestContext aware formatter configured through flags.
 
@@ -284,36 +403,50 @@ class NovaFormatter(logging.Formatter):
     """
 
     def format(self, record):
-        """Uses contextstring if request_id is set, otherwise default."""
+        """Uses contextstring if request_id is set, otherwise default.
+
+        The format string is chosen per record rather than stored on the
+        formatter, since a single instance is shared by every handler.
+
+        """
         if record.__dict__.get('request_id', None):
-            self._fmt = FLAGS.logging_context_format_string
+            fmt = FLAGS.logging_context_format_string
         else:
-            self._fmt = FLAGS.logging_default_format_string
+            fmt = FLAGS.logging_default_format_string
+
+        if record.levelno == logging.DEBUG:
+            suffix = FLAGS.logging_debug_format_suffix
+            if suffix:
+                fmt = _get_debug_format(fmt, suffix)
 
-        if record.levelno == logging.DEBUG \
-        and FLAGS.logging_debug_format_suffix:
-            self._fmt += " " + FLAGS.logging_debug_format_suffix
+        record.message = record.getMessage()
+        if '%(asctime)' in fmt:
+            record.asctime = self.formatTime(record, self.datefmt)
+        s = fmt % record.__dict__
 
-        # Cache this on the record, Logger will respect our formated copy
-        if record.exc_info:
+        # Cache this on the record, Logger will respect our formated copy.
+        # Every handler shares this formatter, so only do it once.
+        if record.exc_info and not record.exc_text:
             record.exc_text = self.formatException(record.exc_info, record)
-        return logging.Formatter.format(self, record)
+        if record.exc_text:
+            if s[-1:] != '\n':
+                s += '\n'
+            try:
+                s += record.exc_text
+            except UnicodeError:
+                s += record.exc_text.decode(sys.getfilesystemencoding(),
+                                            'replace')
+        return s
 
     def formatException(self, exc_info, record=None):
         """Format exception output with FLAGS.logging_exception_prefix."""
         if not record:
             return logging.Formatter.formatException(self, exc_info)
-        stringbuffer = cStringIO.StringIO()
-        traceback.print_exception(exc_info[0], exc_info[1], exc_info[2],
-                                  None, stringbuffer)
-        lines = stringbuffer.getvalue().split('\n')
-        stringbuffer.close()
-        formatted_lines = []
-        for line in lines:
-            pl = FLAGS.logging_exception_prefix % record.__dict__
-            fl = '%s%s' % (pl, line)
-            formatted_lines.append(fl)
-        return '\n'.join(formatted_lines)
+        pl = FLAGS.logging_exception_prefix % record.__dict__
+        lines = traceback.format_exception(exc_info[0], exc_info[1],
+                                           exc_info[2])
+        # entries may span several lines, so prefix at every newline
+        return pl + ''.join(lines).rstrip('\n').replace('\n', '\n' + pl)
 
 
 _formatter = NovaFormatter()
@@ -329,7 +462,6 @@ class NovaRootLogger(NovaLogger):
 
     def setup_from_flags(self):
         """Setup logger from flags."""
-        global _filelog
         if self.syslog:
             self.removeHandler(self.syslog)
             self.syslog = None
@@ -340,7 +472,13 @@ class NovaRootLogger(NovaLogger):
         if logpath:
             if logpath != self.logpath:
                 self.removeHandler(self.filelog)
-                self.filelog = WatchedFileHandler(logpath)
+                if FLAGS.logfile_buffer_records > 0:
+                    self.filelog = BufferedWatchedFileHandler(
+                            logpath,
+                            FLAGS.logfile_buffer_records,
+                            FLAGS.logfile_buffer_interval)
+                else:
+                    self.filelog = WatchedFileHandler(logpath)
                 self.addHandler(self.filelog)
                 self.logpath = logpath
 
@@ -364,10 +502,121 @@ class NovaRootLogger(NovaLogger):
             self.setLevel(INFO)
 
 
+def _call_later(seconds, func):
+    """Run func in a new greenthread after seconds.
+
+    Returns a timer whose cancel() stops func from being run.
+
+    """
+    return hubs.get_hub().schedule_call_global(seconds, greenthread.spawn_n,
+                                               func)
+
+
+class BufferedWatchedFileHandler(WatchedFileHandler):
+    """A WatchedFileHandler that writes records out in batches.
+
+    Records are left in the file's buffer instead of being flushed one at a
+    time, and are written out together once buffer_records have piled up,
+    a record at ERROR or above comes in, or flush_interval seconds after
+    the first record of the batch.
+
+    """
+
+    def __init__(self, filename, buffer_records, flush_interval):
+        WatchedFileHandler.__init__(self, filename)
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self._pending = 0
+        self._batch_start = None
+        self._buffering = False
+        self._timer = None
+
+    def emit(self, record):
+        if not self._pending:
+            self._batch_start = record.created
+        self._pending += 1
+        # the age check covers processes whose eventlet hub is not running
+        # to fire the timer
+        self._buffering = (record.levelno < ERROR and
+                           self._pending < self.buffer_records and
+                           record.created - self._batch_start <
+                           self.flush_interval)
+        try:
+            WatchedFileHandler.emit(self, record)
+        finally:
+            self._buffering = False
+        if self._pending and self._timer is None:
+            self._timer = _call_later(self.flush_interval,
+                                      self._flush_pending)
+
+    def _flush_pending(self):
+        self.acquire()
+        try:
+            self.flush()
+        finally:
+            self.release()
+
+    def flush(self):
+        # StreamHandler.emit() flushes after every record, skip that while
+        # we are still batching.
+        if self._buffering:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        WatchedFileHandler.flush(self)
+        self._pending = 0
+
+
 class PublishErrorsHandler(logging.Handler):
+    """Publishes error records through the notifier.
+
+    If publish_errors_batch_size is greater than 1, errors are collected
+    and published together as one notification with a list of errors in
+    its payload.  A batch is sent once it is full, or
+    publish_errors_batch_interval seconds after its first error.
+
+    """
+
+    def __init__(self, level=NOTSET):
+        logging.Handler.__init__(self, level)
+        self._errors = []
+        self._timer = None
+
     def emit(self, record):
-        nova.notifier.api.notify('nova.error.publisher', 'error_notification',
-            nova.notifier.api.ERROR, dict(error=record.msg))
+        if FLAGS.publish_errors_batch_size <= 1:
+            nova.notifier.api.notify('nova.error.publisher',
+                'error_notification', nova.notifier.api.ERROR,
+                dict(error=record.getMessage()))
+            return
+
+        self._errors.append(dict(error=record.getMessage(),
+                                 name=record.name,
+                                 created=record.created))
+        if len(self._errors) >= FLAGS.publish_errors_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = _call_later(FLAGS.publish_errors_batch_interval,
+                                      self.flush)
+
+    def flush(self):
+        """Publish any errors that are still waiting in the batch."""
+        self.acquire()
+        try:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            errors, self._errors = self._errors, []
+        finally:
+            self.release()
+        if errors:
+            nova.notifier.api.notify('nova.error.publisher',
+                'error_notification', nova.notifier.api.ERROR,
+                dict(errors=errors))
+
+    def close(self):
+        self.flush()
+        logging.Handler.close(self)
 
 
 def handle_exception(type, value, tb):
@@ -379,9 +628,11 @@ def handle_exception(type, value, tb):
 
 def reset():
     """Resets logging handlers.  Should be called if FLAGS changes."""
-    for logger in NovaLogger.manager.loggerDict.itervalues():
-        if isinstance(logger, NovaLogger):
-            logger.setup_from_flags()
+    global _parsed_levels
+    _parsed_levels = None
+    _debug_formats.clear()
+    for logger in _nova_loggers:
+        logger.setup_from_flags()
 
 
 def setup():
@@ -413,11 +664,31 @@ def audit(msg, *args, **kwargs):
 
 
 class WritableLogger(object):
-    """A thin wrapper that responds to `write` and logs."""
+    """A thin wrapper that responds to `write` and logs.
+
+    Writes are buffered until a newline is seen, and every complete line
+    becomes one log record.
+
+    """
 
     def __init__(self, logger, level=logging.INFO):
         self.logger = logger
         self.level = level
+        self._buf = []
 
     def write(self, msg):
-        self.logger.log(self.level, msg)
+        self._buf.append(msg)
+        if '\n' not in msg:
+            return
+        lines = ''.join(self._buf).split('\n')
+        tail = lines.pop()
+        self._buf = [tail] if tail else []
+        for line in lines:
+            if line:
+                self.logger.log(self.level, line)
+
+    def flush(self):
+        msg = ''.join(self._buf)
+        self._buf = []
+        if msg:
+            self.logger.log(self.level, msg)
@@ -557,8 +557,8 @@ class QuantumManager(manager.FloatingIP, manager.FlatManager):
             db.virtual_interface_delete_by_instance(admin_context,
                                                     instance_id)
         except exception.InstanceNotFound:
-            LOG.error(_("Attempted to deallocate non-existent instance: %s" %
-                        (instance_id)))
+            LOG.error(_("Attempted to deallocate non-existent instance: %s"),
+                      instance_id)
 
     # TODO(bgh): At some point we should consider merging enable_dhcp() and
     # update_dhcp()
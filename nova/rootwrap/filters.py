@@ -34,6 +34,10 @@ class CommandFilter(object):
             return True
         return False
 
+    def get_command_name(self):
+        """Returns the only command name this filter can match, None if any"""
+        return os.path.basename(self.exec_path)
+
     def get_command(self, userargs):
         """Returns command to execute (with sudo -u if run_as != root)."""
         if (self.run_as != 'root'):
@@ -49,30 +53,53 @@ class CommandFilter(object):
 class RegExpFilter(CommandFilter):
     """Command filter doing regexp matching for every argument"""
 
+    # Compiled patterns shared by all filters, None if badly-formed
+    _regex_cache = {}
+
+    def __init__(self, exec_path, run_as, *args):
+        super(RegExpFilter, self).__init__(exec_path, run_as, *args)
+        self.regexes = [self._compile(pattern) for pattern in args]
+
+    @classmethod
+    def _compile(cls, pattern):
+        try:
+            return cls._regex_cache[pattern]
+        except KeyError:
+            pass
+        try:
+            # Anchor pattern explicitly at end of string
+            regex = re.compile(pattern + '$')
+        except re.error:
+            regex = None
+        cls._regex_cache[pattern] = regex
+        return regex
+
+    def get_command_name(self):
+        return None
+
     def match(self, userargs):
         # Early skip if command or number of args don't match
-        if (len(self.args) != len(userargs)):
+        if (len(self.regexes) != len(userargs)):
             # DENY: argument numbers don't match
             return False
-        # Compare each arg (anchoring pattern explicitly at end of string)
-        for (pattern, arg) in zip(self.args, userargs):
-            try:
-                if not re.match(pattern + '$', arg):
-                    break
-            except re.error:
+        # Compare each arg
+        for (regex, arg) in zip(self.regexes, userargs):
+            if regex is None:
                 # DENY: Badly-formed filter
                 return False
-        else:
-            # ALLOW: All arguments matched
-            return True
-
-        # DENY: Some arguments did not match
-        return False
+            if not regex.match(arg):
+                # DENY: Some arguments did not match
+                return False
+        # ALLOW: All arguments matched
+        return True
 
 
 class DnsmasqFilter(CommandFilter):
     """Specific filter for the dnsmasq call (which includes env)"""
 
+    def get_command_name(self):
+        return None
+
     def match(self, userargs):
         if (userargs[0].startswith("FLAGFILE=") and
             userargs[1].startswith("NETWORK_ID=") and
@@ -85,8 +112,8 @@ class DnsmasqFilter(CommandFilter):
 
     def get_environment(self, userargs):
         env = os.environ.copy()
-        env['FLAGFILE'] = userargs[0].split('=')[-1]
-        env['NETWORK_ID'] = userargs[1].split('=')[-1]
+        env['FLAGFILE'] = userargs[0].partition('=')[2]
+        env['NETWORK_ID'] = userargs[1].partition('=')[2]
         return env
 
 
@@ -99,6 +126,9 @@ class KillFilter(CommandFilter):
        executable, so it will only work on procfs-capable systems (not OSX).
     """
 
+    def get_command_name(self):
+        return None
+
     def match(self, userargs):
         args = list(userargs)
         if len(args) == 3:
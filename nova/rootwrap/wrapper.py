@@ -16,6 +16,7 @@
 #    under the License.
 
 
+import heapq
 import os
 import sys
 
@@ -41,12 +42,32 @@ def load_filters():
     return filters
 
 
-def match_filter(filters, userargs):
+def build_filter_index(filters):
+    """
+    Groups filters by the command name they can match, so that
+    match_filter only needs to try the relevant ones. Filters that may
+    match any command are grouped under None.
+    """
+
+    index = {None: []}
+    for position, f in enumerate(filters):
+        index.setdefault(f.get_command_name(), []).append((position, f))
+    return index
+
+
+def match_filter(filters, userargs, index=None):
     """
     Checks user command and arguments through command filters and
     returns the first matching filter, or None is none matched.
+
+    If an index built by build_filter_index(filters) is given, only the
+    filters that can match the command are checked, still in order.
     """
 
+    if index is not None:
+        candidates = heapq.merge(index.get(userargs[0], []), index[None])
+        filters = [f for _position, f in candidates]
+
     for f in filters:
         if f.match(userargs):
             # Skip if executable is absent
@@ -366,7 +366,7 @@ class Connection(object):
         for consumer in self.consumers:
             consumer.reconnect(self.channel)
         LOG.info(_('Connected to AMQP server on '
-                '%(hostname)s:%(port)d' % self.params))
+                '%(hostname)s:%(port)d'), self.params)
 
     def reconnect(self):
         """Handles reconnecting and re-establishing queues.
@@ -30,16 +30,22 @@ from nova.openstack.common import cfg
 from nova import rpc
 from nova import utils
 
+import eventlet
 from eventlet import greenpool
 
 
-enable_zone_routing_opt = \
+scheduler_api_opts = [
     cfg.BoolOpt('enable_zone_routing',
                 default=False,
-                help='When True, routing to child zones will occur.')
+                help='When True, routing to child zones will occur.'),
+    cfg.IntOpt('zone_call_timeout',
+               default=0,
+               help='Seconds to wait for each child zone to answer a '
+                    'call_zone_method() request. 0 waits indefinitely.'),
+    ]
 
 FLAGS = flags.FLAGS
-FLAGS.add_option(enable_zone_routing_opt)
+FLAGS.add_options(scheduler_api_opts)
 
 LOG = logging.getLogger('nova.scheduler.api')
 
@@ -126,45 +132,57 @@ def update_service_capabilities(context, service_name, host, capabilities):
 def call_zone_method(context, method_name, errors_to_ignore=None,
                      novaclient_collection_name='zones', zones=None,
                      *args, **kwargs):
-    """Returns a list of (zone, call_result) objects."""
+    """Returns a list of (zone, call_result) objects.
+
+    Each zone is authenticated against and called in its own
+    greenthread. Zones that fail authentication or do not answer within
+    FLAGS.zone_call_timeout seconds are left out of the results.
+    """
     if not isinstance(errors_to_ignore, (list, tuple)):
         # This will also handle the default None
         errors_to_ignore = [errors_to_ignore]
 
-    pool = greenpool.GreenPool()
-    results = []
-    if zones is None:
-        zones = db.zone_get_all(context.elevated())
-    for zone in zones:
-        try:
-            # Do this on behalf of the user ...
-            nova = novaclient.Client(zone.username, zone.password, None,
-                    zone.api_url, region_name=zone.name,
-                    token=context.auth_token)
-            nova.authenticate()
-        except novaclient_exceptions.BadRequest, e:
-            url = zone.api_url
-            name = zone.name
-            LOG.warn(_("Authentication failed to zone "
-                       "'%(name)s' URL=%(url)s: %(e)s") % locals())
-            #TODO (dabo) - add logic for failure counts per zone,
-            # with escalation after a given number of failures.
-            continue
-        novaclient_collection = getattr(nova, novaclient_collection_name)
-        collection_method = getattr(novaclient_collection, method_name)
-
-        def _error_trap(*args, **kwargs):
+    skipped = object()
+
+    def _call_zone(zone):
+        url = zone.api_url
+        name = zone.name
+        with eventlet.Timeout(FLAGS.zone_call_timeout or None, False):
+            try:
+                # Do this on behalf of the user ...
+                nova = novaclient.Client(zone.username, zone.password, None,
+                        zone.api_url, region_name=zone.name,
+                        token=context.auth_token)
+                nova.authenticate()
+            except novaclient_exceptions.BadRequest, e:
+                LOG.warn(_("Authentication failed to zone "
+                           "'%(name)s' URL=%(url)s: %(e)s") % locals())
+                #TODO (dabo) - add logic for failure counts per zone,
+                # with escalation after a given number of failures.
+                return skipped
+            novaclient_collection = getattr(nova, novaclient_collection_name)
+            collection_method = getattr(novaclient_collection, method_name)
             try:
                 return collection_method(*args, **kwargs)
             except Exception as e:
                 if type(e) in errors_to_ignore:
                     return None
                 raise
+        LOG.warn(_("Timed out waiting for zone '%(name)s' URL=%(url)s"),
+                 locals())
+        return skipped
 
-        res = pool.spawn(_error_trap, *args, **kwargs)
-        results.append((zone, res))
+    pool = greenpool.GreenPool()
+    if zones is None:
+        zones = db.zone_get_all(context.elevated())
+    results = [(zone, pool.spawn(_call_zone, zone)) for zone in zones]
     pool.waitall()
-    return [(zone.id, res.wait()) for zone, res in results]
+    ret = []
+    for zone, res in results:
+        result = res.wait()
+        if result is not skipped:
+            ret.append((zone.id, result))
+    return ret
 
 
 def child_zone_helper(context, zone_list, func):
@@ -224,8 +242,8 @@ def _issue_novaclient_command(nova, zone, collection,
         except novaclient_exceptions.NotFound:
             url = zone.api_url
             LOG.debug(_("%(collection)s.%(method_name)s didn't find "
-                    "anything matching '%(kwargs)s' on '%(url)s'" %
-                    locals()))
+                    "anything matching '%(kwargs)s' on '%(url)s'"),
+                    locals())
             return None
 
     args = list(args)
@@ -235,8 +253,8 @@ def _issue_novaclient_command(nova, zone, collection,
         result = manager.get(item)
     except novaclient_exceptions.NotFound, e:
         url = zone.api_url
-        LOG.debug(_("%(collection)s '%(item)s' not found on '%(url)s'" %
-                                                locals()))
+        LOG.debug(_("%(collection)s '%(item)s' not found on '%(url)s'"),
+                  locals())
         raise e
 
     if method_name.lower() != 'get':
@@ -323,7 +341,7 @@ class reroute_compute(object):
                     # to reroute to a child zone
                     attempt_reroute = True
                     LOG.debug(_("Instance %(item_uuid)s not found "
-                                        "locally: '%(e)s'" % locals()))
+                                        "locally: '%(e)s'"), locals())
                 else:
                     # NOTE(sirp): since we're not re-routing in this case, and
                     # we we were passed a UUID, we need to replace that UUID
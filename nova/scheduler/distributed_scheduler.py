@@ -19,6 +19,7 @@ You can customize this scheduler by specifying your own Host Filters and
 Weighing Functions.
 """
 
+import heapq
 import json
 import operator
 
@@ -47,8 +48,13 @@ class DistributedScheduler(driver.Scheduler):
     """
     def __init__(self, *args, **kwargs):
         super(DistributedScheduler, self).__init__(*args, **kwargs)
-        self.cost_function_cache = {}
+        # Schedulers only support compute right now, so load its cost
+        # functions up front rather than on the first request.
+        self.cost_function_cache = {
+                'compute': self._build_cost_functions('compute')}
         self.options = scheduler_options.SchedulerOptions()
+        # (key, decryptor) for the last build plan encryption key used.
+        self._decryptor = None
 
     def schedule(self, context, topic, method, *args, **kwargs):
         """The schedule() contract requires we return the one
@@ -56,7 +62,7 @@ class DistributedScheduler(driver.Scheduler):
 
         NOTE: We're only focused on compute instances right now,
         so this method will always raise NoValidHost()."""
-        msg = _("No host selection for %s defined." % topic)
+        msg = _("No host selection for %s defined.") % topic
         raise exception.NoValidHost(reason=msg)
 
     def schedule_run_instance(self, context, request_spec, *args, **kwargs):
@@ -73,8 +79,8 @@ class DistributedScheduler(driver.Scheduler):
 
         elevated = context.elevated()
         num_instances = request_spec.get('num_instances', 1)
-        LOG.debug(_("Attempting to build %(num_instances)d instance(s)") %
-                locals())
+        LOG.debug(_("Attempting to build %(num_instances)d instance(s)"),
+                {'num_instances': num_instances})
 
         weighted_hosts = []
 
@@ -86,7 +92,7 @@ class DistributedScheduler(driver.Scheduler):
         else:
             # No plan ... better make one.
             weighted_hosts = self._schedule(context, "compute", request_spec,
-                                        *args, **kwargs)
+                                        elevated=elevated, *args, **kwargs)
 
         if not weighted_hosts:
             raise exception.NoValidHost(reason=_(""))
@@ -96,6 +102,9 @@ class DistributedScheduler(driver.Scheduler):
         kwargs.pop('filter_properties', None)
 
         instances = []
+        # Authenticated novaclients for child zones, reused for every
+        # instance in this request that lands in the same zone.
+        zone_clients = {}
         for num in xrange(num_instances):
             if not weighted_hosts:
                 break
@@ -104,7 +113,9 @@ class DistributedScheduler(driver.Scheduler):
             instance = None
             if weighted_host.zone:
                 instance = self._ask_child_zone_to_create_instance(elevated,
-                                        weighted_host, request_spec, kwargs)
+                                        weighted_host, request_spec, kwargs,
+                                        zone_clients=zone_clients,
+                                        elevated=elevated)
             else:
                 instance = self._provision_resource_locally(elevated,
                                         weighted_host, request_spec, kwargs)
@@ -126,14 +137,15 @@ class DistributedScheduler(driver.Scheduler):
 
         elevated = context.elevated()
         LOG.debug(_("Attempting to determine target host for resize to "
-                    "instance type %(instance_type_id)s") % locals())
+                    "instance type %(instance_type_id)s"),
+                  {'instance_type_id': instance_type_id})
 
         # Convert it to an actual instance type
         instance_type = db.instance_type_get(elevated, instance_type_id)
 
         # Now let's grab a possibility
         hosts = self._schedule(context, 'compute', request_spec,
-                               *args, **kwargs)
+                               elevated=elevated, *args, **kwargs)
         if not hosts:
             raise exception.NoValidHost(reason=_(""))
         host = hosts.pop(0)
@@ -164,8 +176,16 @@ class DistributedScheduler(driver.Scheduler):
                                     kwargs):
         """Create the requested resource in this Zone."""
         instance = self.create_instance_db_entry(context, request_spec)
-        driver.cast_to_compute_host(context, weighted_host.host_state.host,
+        host = weighted_host.host_state.host
+        driver.cast_to_compute_host(context, host,
                 'run_instance', instance_uuid=instance['uuid'], **kwargs)
+        # Host managers that don't subclass HostManager may not cache
+        # host states, so there may be nothing to update.
+        consume_cached = getattr(self.host_manager,
+                                 'consume_cached_host_state', None)
+        if consume_cached is not None:
+            consume_cached('compute', host,
+                           request_spec['instance_properties'])
         inst = driver.encode_instance(instance, local=True)
         # So if another instance is created, create_instance_db_entry will
         # actually create a new entry, instead of assume it's been created
@@ -173,12 +193,20 @@ class DistributedScheduler(driver.Scheduler):
         del request_spec['instance_properties']['uuid']
         return inst
 
+    def _get_decryptor(self):
+        """Returns a decryptor for the build plan encryption key,
+        reusing the previous one while the key is unchanged.
+        """
+        key = FLAGS.build_plan_encryption_key
+        if self._decryptor is None or self._decryptor[0] != key:
+            self._decryptor = (key, crypto.decryptor(key))
+        return self._decryptor[1]
+
     def _make_weighted_host_from_blob(self, blob):
         """Returns the decrypted blob as a WeightedHost object
         or None if invalid. Broken out for testing.
         """
-        decryptor = crypto.decryptor(FLAGS.build_plan_encryption_key)
-        json_entry = decryptor(blob)
+        json_entry = self._get_decryptor()(blob)
 
         # Extract our WeightedHost values
         wh_dict = json.loads(json_entry)
@@ -190,7 +218,7 @@ class DistributedScheduler(driver.Scheduler):
                     blob=blob, zone=zone)
 
     def _ask_child_zone_to_create_instance(self, context, weighted_host,
-            request_spec, kwargs):
+            request_spec, kwargs, zone_clients=None, elevated=None):
         """Once we have determined that the request should go to one
         of our children, we need to fabricate a new POST /servers/
         call with the same parameters that were passed into us.
@@ -199,6 +227,11 @@ class DistributedScheduler(driver.Scheduler):
         Note that we have to reverse engineer from our args to get back the
         image, flavor, ipgroup, etc. since the original call could have
         come in from EC2 (which doesn't use these things).
+
+        zone_clients, if given, maps zone ids to (zone, novaclient) and
+        is used to avoid authenticating to the same zone repeatedly.
+        Callers that already have an elevated copy of context may pass
+        it as elevated to save making another.
         """
         instance_type = request_spec['instance_type']
         instance_properties = request_spec['instance_properties']
@@ -210,21 +243,28 @@ class DistributedScheduler(driver.Scheduler):
         reservation_id = instance_properties['reservation_id']
         files = kwargs['injected_files']
 
-        zone = db.zone_get(context.elevated(), weighted_host.zone)
-        zone_name = zone.name
-        url = zone.api_url
-        LOG.debug(_("Forwarding instance create call to zone '%(zone_name)s'. "
-                "ReservationID=%(reservation_id)s") % locals())
-        nova = None
+        if zone_clients is None:
+            zone_clients = {}
         try:
-            # This operation is done as the caller, not the zone admin.
-            nova = novaclient.Client(zone.username, zone.password, None, url,
-                                     token=context.auth_token,
-                                     region_name=zone_name)
-            nova.authenticate()
-        except novaclient_exceptions.BadRequest, e:
-            raise exception.NotAuthorized(_("Bad credentials attempting "
-                    "to talk to zone at %(url)s.") % locals())
+            zone, nova = zone_clients[weighted_host.zone]
+        except KeyError:
+            zone = db.zone_get(elevated or context.elevated(),
+                               weighted_host.zone)
+            url = zone.api_url
+            try:
+                # This operation is done as the caller, not the zone admin.
+                nova = novaclient.Client(zone.username, zone.password, None,
+                                         url, token=context.auth_token,
+                                         region_name=zone.name)
+                nova.authenticate()
+            except novaclient_exceptions.BadRequest, e:
+                raise exception.NotAuthorized(_("Bad credentials attempting "
+                        "to talk to zone at %(url)s.") % locals())
+            zone_clients[weighted_host.zone] = (zone, nova)
+
+        LOG.debug(_("Forwarding instance create call to zone '%(zone_name)s'. "
+                "ReservationID=%(reservation_id)s"),
+                {'zone_name': zone.name, 'reservation_id': reservation_id})
         # NOTE(Vek): Novaclient has two different calling conventions
         #            for this call, depending on whether you're using
         #            1.0 or 1.1 API: in 1.0, there's an ipgroups
@@ -244,27 +284,32 @@ class DistributedScheduler(driver.Scheduler):
         to adjust the weights returned from the child zones. Returns
         a list of WeightedHost objects: [WeightedHost(), ...]
         """
+        zone_by_id = dict((zone_rec['id'], zone_rec) for zone_rec in zones)
         weighted_hosts = []
         for zone_id, result in child_results:
             if not result:
                 continue
 
-            for zone_rec in zones:
-                if zone_rec['id'] != zone_id:
+            zone_rec = zone_by_id.get(zone_id)
+            if zone_rec is None:
+                continue
+            offset = zone_rec.get('weight_offset')
+            scale = zone_rec.get('weight_scale')
+            if offset is None or scale is None:
+                LOG.error(_("Bad child zone scaling values "
+                        "for Zone: %(zone_id)s"), {'zone_id': zone_id})
+                continue
+            for item in result:
+                missing = [key for key in ('weight', 'blob')
+                           if key not in item]
+                if missing:
+                    LOG.error(_("Child zone %(zone_id)s returned a host "
+                            "without %(keys)s"),
+                            {'zone_id': zone_id, 'keys': ', '.join(missing)})
                     continue
-                for item in result:
-                    try:
-                        offset = zone_rec['weight_offset']
-                        scale = zone_rec['weight_scale']
-                        raw_weight = item['weight']
-                        cooked_weight = offset + scale * raw_weight
-
-                        weighted_hosts.append(least_cost.WeightedHost(
-                               cooked_weight, zone=zone_id,
-                               blob=item['blob']))
-                    except KeyError:
-                        LOG.exception(_("Bad child zone scaling values "
-                                "for Zone: %(zone_id)s") % locals())
+                cooked_weight = offset + scale * item['weight']
+                weighted_hosts.append(least_cost.WeightedHost(
+                       cooked_weight, zone=zone_id, blob=item['blob']))
         return weighted_hosts
 
     def _zone_get_all(self, context):
@@ -278,14 +323,20 @@ class DistributedScheduler(driver.Scheduler):
     def populate_filter_properties(self, request_spec, filter_properties):
         """Stuff things into filter_properties.  Can be overriden in a
         subclass to add more data.
+
+        Called once per scheduling request, before any hosts are
+        filtered, so subclasses may do expensive lookups here.
         """
         pass
 
     def _schedule(self, context, topic, request_spec, *args, **kwargs):
         """Returns a list of hosts that meet the required specs,
         ordered by their fitness.
+
+        Callers that already have an elevated copy of context may pass
+        it as elevated= to save making another.
         """
-        elevated = context.elevated()
+        elevated = kwargs.pop('elevated', None) or context.elevated()
         if topic != "compute":
             msg = _("Scheduler only understands Compute nodes (for now)")
             raise NotImplementedError(msg)
@@ -300,7 +351,7 @@ class DistributedScheduler(driver.Scheduler):
         cost_functions = self.get_cost_functions()
         config_options = self._get_configuration_options()
 
-        filter_properties = kwargs.get('filter_properties', {})
+        filter_properties = kwargs.get('filter_properties') or {}
         filter_properties.update({'context': context,
                                   'request_spec': request_spec,
                                   'config_options': config_options,
@@ -309,27 +360,29 @@ class DistributedScheduler(driver.Scheduler):
         self.populate_filter_properties(request_spec,
                                         filter_properties)
 
-        # Find our local list of acceptable hosts by repeatedly
-        # filtering and weighing our options. Each time we choose a
+        # Find our local list of acceptable hosts by filtering and
+        # then repeatedly weighing our options. Each time we choose a
         # host, we virtually consume resources on it so subsequent
         # selections can adjust accordingly.
 
         # unfiltered_hosts_dict is {host : ZoneManager.HostInfo()}
         unfiltered_hosts_dict = self.host_manager.get_all_host_states(
                 elevated, topic)
-        hosts = unfiltered_hosts_dict.itervalues()
+        hosts = unfiltered_hosts_dict.values()
+
+        # Filter local hosts based on requirements ...
+        hosts = self.host_manager.filter_hosts(hosts, filter_properties)
 
         num_instances = request_spec.get('num_instances', 1)
         selected_hosts = []
+        debug = LOG.isEnabledFor(logging.DEBUG)
         for num in xrange(num_instances):
-            # Filter local hosts based on requirements ...
-            hosts = self.host_manager.filter_hosts(hosts,
-                    filter_properties)
             if not hosts:
                 # Can't get any more locally.
                 break
 
-            LOG.debug(_("Filtered %(hosts)s") % locals())
+            if debug:
+                LOG.debug(_("Filtered %(hosts)s"), {'hosts': hosts})
 
             # weighted_host = WeightedHost() ... the best
             # host for the job.
@@ -339,24 +392,33 @@ class DistributedScheduler(driver.Scheduler):
             # variable at that time.
             weighted_host = least_cost.weighted_sum(cost_functions,
                     hosts, filter_properties)
-            LOG.debug(_("Weighted %(weighted_host)s") % locals())
+            if debug:
+                LOG.debug(_("Weighted %(weighted_host)s"),
+                          {'weighted_host': weighted_host})
             selected_hosts.append(weighted_host)
 
             # Now consume the resources so the filter/weights
             # will change for the next instance.
-            weighted_host.host_state.consume_from_instance(
-                    instance_properties)
+            host_state = weighted_host.host_state
+            host_state.consume_from_instance(instance_properties)
+
+            # The chosen host is the only one whose state changed, so
+            # it is the only one that needs filtering again.
+            if not self.host_manager.filter_hosts([host_state],
+                                                  filter_properties):
+                hosts.remove(host_state)
 
         # Next, tack on the host weights from the child zones
         if not filter_properties.get('local_zone_only', False):
-            json_spec = json.dumps(request_spec)
             all_zones = self._zone_get_all(elevated)
-            child_results = self._call_zone_method(elevated, "select",
-                    specs=json_spec, zones=all_zones)
-            selected_hosts.extend(self._adjust_child_weights(
+            if all_zones:
+                json_spec = json.dumps(request_spec)
+                child_results = self._call_zone_method(elevated, "select",
+                        specs=json_spec, zones=all_zones)
+                selected_hosts.extend(self._adjust_child_weights(
                                                     child_results, all_zones))
-        selected_hosts.sort(key=operator.attrgetter('weight'))
-        return selected_hosts[:num_instances]
+        return heapq.nsmallest(num_instances, selected_hosts,
+                               key=operator.attrgetter('weight'))
 
     def get_cost_functions(self, topic=None):
         """Returns a list of tuples containing weights and cost functions to
@@ -365,9 +427,15 @@ class DistributedScheduler(driver.Scheduler):
         if topic is None:
             # Schedulers only support compute right now.
             topic = "compute"
-        if topic in self.cost_function_cache:
+        try:
             return self.cost_function_cache[topic]
+        except KeyError:
+            cost_fns = self._build_cost_functions(topic)
+            self.cost_function_cache[topic] = cost_fns
+            return cost_fns
 
+    def _build_cost_functions(self, topic):
+        """Loads the weights and cost functions configured for topic."""
         cost_fns = []
         for cost_fn_str in FLAGS.least_cost_functions:
             if '.' in cost_fn_str:
@@ -396,6 +464,4 @@ class DistributedScheduler(driver.Scheduler):
                 raise exception.SchedulerWeightFlagNotFound(
                         flag_name=flag_name)
             cost_fns.append((weight, cost_fn))
-
-        self.cost_function_cache[topic] = cost_fns
         return cost_fns
@@ -24,6 +24,9 @@ class JsonFilter(abstract_filter.AbstractHostFilter):
     """Host Filter to allow simple JSON-based grammar for
     selecting hosts.
     """
+    # (query, parsed query) for the last query seen by this instance.
+    _parsed_query = None
+
     def _op_compare(self, args, op):
         """Returns True if the specified operator can successfully
         compare the first item in the args with all the rest. Will
@@ -124,6 +127,16 @@ class JsonFilter(abstract_filter.AbstractHostFilter):
         result = method(self, cooked_args)
         return result
 
+    def _load_query(self, query):
+        """Parse the query once per filter pass rather than once per
+        host, since every host is checked against the same query.
+        """
+        cached = self._parsed_query
+        if cached is None or cached[0] != query:
+            cached = (query, json.loads(query))
+            self._parsed_query = cached
+        return cached[1]
+
     def host_passes(self, host_state, filter_properties):
         """Return a list of hosts that can fulfill the requirements
         specified in the query.
@@ -135,7 +148,7 @@ class JsonFilter(abstract_filter.AbstractHostFilter):
         # NOTE(comstud): Not checking capabilities or service for
         # enabled/disabled so that a provided json filter can decide
 
-        result = self._process_filter(json.loads(query), host_state)
+        result = self._process_filter(self._load_query(query), host_state)
         if isinstance(result, list):
             # If any succeeded, include the host
             result = any(result)
@@ -17,6 +17,7 @@
 Manage hosts in the current zone.
 """
 
+import copy
 import datetime
 import types
 import UserDict
@@ -44,6 +45,14 @@ host_manager_opts = [
                   ],
                 help='Which filters to use for filtering hosts when not '
                      'specified in the request.'),
+    cfg.IntOpt('scheduler_host_state_ttl',
+               default=0,
+               help='Seconds to reuse host states read from the database '
+                    'between scheduling requests. 0 reads them for every '
+                    'request. Only instances this scheduler provisions '
+                    'locally are counted against the reused states; '
+                    'resizes and builds by other schedulers are seen at '
+                    'the next read.'),
     ]
 
 FLAGS = flags.FLAGS
@@ -158,6 +167,8 @@ class HostManager(object):
     def __init__(self):
         self.service_states = {}  # { <host> : { <service> : { cap k : v }}}
         self.filter_classes = self._get_filter_classes()
+        # { <topic> : (<time read>, { <host> : HostState() }) }
+        self.host_state_cache = {}
 
     def _get_filter_classes(self):
         """Get the list of possible filter classes"""
@@ -204,7 +215,9 @@ class HostManager(object):
         return good_filters
 
     def filter_hosts(self, hosts, filter_properties, filters=None):
-        """Filter hosts and return only ones passing all filters"""
+        """Filter hosts and return a list of only ones passing all
+        filters.
+        """
         filtered_hosts = []
         filter_fns = self._choose_host_filters(filters)
         for host in hosts:
@@ -300,12 +313,41 @@ class HostManager(object):
         Note: this can be very slow with a lot of instances.
         InstanceType table isn't required since a copy is stored
         with the instance (in case the InstanceType changed since the
-        instance was created)."""
+        instance was created).
+
+        When FLAGS.scheduler_host_state_ttl is set, the db is read at
+        most once in that many seconds, and callers get copies of the
+        cached HostStates. Resources consumed from the copies are not
+        kept; use consume_cached_host_state() once an instance has
+        really been placed on a host."""
 
         if topic != 'compute':
             raise NotImplementedError(_(
                 "host_manager only implemented for 'compute'"))
 
+        ttl = FLAGS.scheduler_host_state_ttl
+        if ttl <= 0:
+            return self._get_all_host_states(context, topic)
+
+        now = utils.utcnow()
+        cached = self.host_state_cache.get(topic)
+        if not cached or now - cached[0] >= datetime.timedelta(seconds=ttl):
+            cached = (now, self._get_all_host_states(context, topic))
+            self.host_state_cache[topic] = cached
+        return dict((host, copy.copy(host_state))
+                    for host, host_state in cached[1].iteritems())
+
+    def consume_cached_host_state(self, topic, host, instance):
+        """Count an instance placed on host against the cached host
+        state, so requests served from the cache before the next db
+        read see it.
+        """
+        cached = self.host_state_cache.get(topic)
+        if cached and host in cached[1]:
+            cached[1][host].consume_from_instance(instance)
+
+    def _get_all_host_states(self, context, topic):
+        """Reads the host states for get_all_host_states() from the db."""
         host_state_map = {}
 
         # Make a compute node dict with the bare essential metrics.
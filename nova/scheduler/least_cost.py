@@ -100,30 +100,15 @@ def weighted_sum(weighted_fns, host_states, weighing_properties):
     candidate.
     """
 
-    # Make a grid of functions results.
-    # One row per host. One column per function.
-    scores = []
-    for weight, fn in weighted_fns:
-        scores.append([fn(host_state, weighing_properties)
-                for host_state in host_states])
-
-    # Adjust the weights in the grid by the functions weight adjustment
-    # and sum them up to get a final list of weights.
-    adjusted_scores = []
-    for (weight, fn), row in zip(weighted_fns, scores):
-        adjusted_scores.append([weight * score for score in row])
-
-    # Now, sum down the columns to get the final score. Column per host.
-    final_scores = [0.0] * len(host_states)
-    for row in adjusted_scores:
-        for idx, col in enumerate(row):
-            final_scores[idx] += col
-
-    # Super-impose the host_state into the scores so
-    # we don't lose it when we sort.
-    final_scores = [(final_scores[idx], host_state)
-            for idx, host_state in enumerate(host_states)]
-
-    final_scores = sorted(final_scores)
-    weight, host_state = final_scores[0]  # Lowest score is the winner!
-    return WeightedHost(weight, host_state=host_state)
+    # Sum the weighted function results for each host, keeping only
+    # the lowest score seen so far. Lowest score is the winner!
+    best_score = None
+    best_host_state = None
+    for host_state in host_states:
+        score = 0.0
+        for weight, fn in weighted_fns:
+            score += weight * fn(host_state, weighing_properties)
+        if best_host_state is None or score < best_score:
+            best_score = score
+            best_host_state = host_state
+    return WeightedHost(best_score, host_state=best_host_state)
@@ -22,6 +22,7 @@ from nova import context
 from nova import db
 from nova import exception
 from nova.scheduler import distributed_scheduler
+from nova.scheduler import driver
 from nova.scheduler import least_cost
 from nova.scheduler import host_manager
 from nova import test
@@ -91,6 +92,23 @@ class DistributedSchedulerTestCase(test.TestCase):
             if weighted_host.zone == 'zone3':  # Scale x1000
                 self.assertEqual(scaled.pop(0), w)
 
+    def test_adjust_child_weights_missing_key(self):
+        """Results without a weight or blob are skipped and logged
+        with the key that is missing, not as bad scaling values.
+        """
+        errors = []
+
+        def fake_error(msg, *args):
+            errors.append(msg % args[0])
+
+        self.stubs.Set(distributed_scheduler.LOG, 'error', fake_error)
+        sched = fakes.FakeDistributedScheduler()
+        child_results = [(1, [dict(weight=2), dict(weight=4, blob='B')])]
+        zones = [dict(id=1, weight_offset=0.0, weight_scale=1.0)]
+        weighted_hosts = sched._adjust_child_weights(child_results, zones)
+        self.assertEqual([w.blob for w in weighted_hosts], ['B'])
+        self.assertEqual(errors, ['Child zone 1 returned a host without blob'])
+
     def test_run_instance_no_hosts(self):
         """
         Ensure empty hosts & child_zones result in NoValidHosts exception.
@@ -283,6 +301,72 @@ class DistributedSchedulerTestCase(test.TestCase):
             self.assertTrue(weighted_host.host_state is not None)
             self.assertTrue(weighted_host.zone is None)
 
+    def test_schedule_drops_host_that_fills_up(self):
+        """Hosts are filtered once per request, so make sure a host
+        stops being chosen once the instances placed on it so far use
+        up its RAM.
+        """
+        sched = fakes.FakeDistributedScheduler()
+        self.flags(default_host_filters=['RamFilter'],
+                   ram_allocation_ratio=1.0)
+        fake_context = context.RequestContext('user', 'project',
+                is_admin=True)
+
+        host_states = {
+            'host1': fakes.FakeHostState('host1', 'compute',
+                    {'free_ram_mb': 1024, 'free_disk_mb': 102400}),
+            'host2': fakes.FakeHostState('host2', 'compute',
+                    {'free_ram_mb': 4096, 'free_disk_mb': 102400}),
+        }
+        self.stubs.Set(sched.host_manager, 'get_all_host_states',
+                lambda context, topic: host_states)
+
+        request_spec = {'num_instances': 4,
+                        'instance_type': {'memory_mb': 512, 'root_gb': 1,
+                                          'ephemeral_gb': 0},
+                        'instance_properties': {'project_id': 1,
+                                                'memory_mb': 512,
+                                                'root_gb': 1,
+                                                'ephemeral_gb': 0,
+                                                'vcpus': 1}}
+        filter_properties = {'local_zone_only': True}
+        weighted_hosts = sched._schedule(fake_context, 'compute',
+                request_spec, filter_properties=filter_properties)
+
+        # Fill-first puts the first two instances on host1, which is
+        # then full, so the rest have to go to host2.
+        chosen = [weighted_host.host_state.host
+                  for weighted_host in weighted_hosts]
+        self.assertEqual(chosen, ['host1', 'host1', 'host2', 'host2'])
+        self.assertEqual(host_states['host1'].free_ram_mb, 0)
+        self.assertEqual(host_states['host2'].free_ram_mb, 3072)
+
+    def test_provision_locally_without_host_state_cache(self):
+        """A host manager that doesn't subclass HostManager has no
+        cached host states to update after the cast.
+        """
+
+        class FakeHostManager(object):
+            pass
+
+        casts = []
+        sched = fakes.FakeDistributedScheduler()
+        sched.host_manager = FakeHostManager()
+        self.stubs.Set(sched, 'create_instance_db_entry',
+                lambda context, request_spec: {'id': 1, 'uuid': 'fake-uuid'})
+        self.stubs.Set(driver, 'cast_to_compute_host',
+                lambda context, host, method, **kwargs: casts.append(host))
+        fake_context = context.RequestContext('user', 'project',
+                is_admin=True)
+        weighted_host = least_cost.WeightedHost(1,
+                host_state=host_manager.HostState('host1', 'compute'))
+        request_spec = {'instance_properties': {'uuid': 'fake-uuid'}}
+
+        instance = sched._provision_resource_locally(fake_context,
+                weighted_host, request_spec, {})
+        self.assertEqual(casts, ['host1'])
+        self.assertEqual(instance['id'], 1)
+
     def test_decrypt_blob(self):
         """Test that the decrypt method works."""
 
@@ -301,6 +385,58 @@ class DistributedSchedulerTestCase(test.TestCase):
         self.assertEqual(weighted_host.to_dict(), dict(weight=1, host='x',
                          blob='y', zone='z'))
 
+    def test_child_zone_client_reused(self):
+        """Instances sent to the same child zone share one client."""
+        self.auth_count = 0
+        test_case = self
+
+        class FakeZone(object):
+            id = 1
+            name = 'zone1'
+            api_url = 'http://zone1'
+            username = 'admin'
+            password = 'password'
+
+        class FakeInstance(object):
+            _info = {'id': 1}
+
+        class FakeNovaClient(object):
+            def __init__(self, *args, **kwargs):
+                self.servers = self
+
+            def authenticate(self):
+                test_case.auth_count += 1
+
+            def create(self, *args, **kwargs):
+                return FakeInstance()
+
+        zone_get_contexts = []
+
+        def fake_zone_get(context, zone_id):
+            zone_get_contexts.append(context)
+            return FakeZone()
+
+        self.stubs.Set(db, 'zone_get', fake_zone_get)
+        self.stubs.Set(distributed_scheduler.novaclient, 'Client',
+                       FakeNovaClient)
+
+        sched = fakes.FakeDistributedScheduler()
+        fake_context = context.RequestContext('user', 'project')
+        elevated = fake_context.elevated()
+        request_spec = {'instance_type': {'flavorid': 1},
+                        'instance_properties': {'display_name': 'x',
+                                                'image_ref': 'i',
+                                                'metadata': {},
+                                                'reservation_id': 'r'}}
+        weighted_host = least_cost.WeightedHost(1, zone=1, blob='y')
+        zone_clients = {}
+        for i in xrange(2):
+            sched._ask_child_zone_to_create_instance(fake_context,
+                    weighted_host, request_spec, {'injected_files': []},
+                    zone_clients=zone_clients, elevated=elevated)
+        self.assertEqual(self.auth_count, 1)
+        self.assertEqual(zone_get_contexts, [elevated])
+
     def test_get_cost_functions(self):
         self.flags(reserved_host_memory_mb=128)
         fixture = fakes.FakeDistributedScheduler()
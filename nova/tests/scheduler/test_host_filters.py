@@ -315,6 +315,34 @@ class HostFiltersTestCase(test.TestCase):
                  'capabilities': capabilities})
         self.assertFalse(filt_cls.host_passes(host, filter_properties))
 
+    def test_json_filter_parses_query_once(self):
+        filt_cls = filters.JsonFilter()
+        filter_properties = {'instance_type': {'memory_mb': 1024,
+                                               'root_gb': 200,
+                                               'ephemeral_gb': 0},
+                             'query': self.json_query}
+        capabilities = {'enabled': True}
+        host1 = fakes.FakeHostState('host1', 'compute',
+                {'free_ram_mb': 1024,
+                 'free_disk_mb': 200 * 1024,
+                 'capabilities': capabilities})
+        host2 = fakes.FakeHostState('host2', 'compute',
+                {'free_ram_mb': 1023,
+                 'free_disk_mb': 200 * 1024,
+                 'capabilities': capabilities})
+
+        loads = []
+        orig_loads = json.loads
+
+        def fake_loads(s):
+            loads.append(s)
+            return orig_loads(s)
+
+        self.stubs.Set(json, 'loads', fake_loads)
+        self.assertTrue(filt_cls.host_passes(host1, filter_properties))
+        self.assertFalse(filt_cls.host_passes(host2, filter_properties))
+        self.assertEqual(loads, [self.json_query])
+
     def test_json_filter_fails_on_caps_disabled(self):
         filt_cls = filters.JsonFilter()
         json_query = json.dumps(
@@ -281,6 +281,53 @@ class HostManagerTestCase(test.TestCase):
         # 8191GB
         self.assertEqual(host_states['host4'].free_disk_mb, 8387584)
 
+    def test_get_all_host_states_cached(self):
+        self.flags(scheduler_host_state_ttl=5,
+                reserved_host_memory_mb=512,
+                reserved_host_disk_mb=1024)
+
+        context = 'fake_context'
+        topic = 'compute'
+
+        self.mox.StubOutWithMock(utils, 'utcnow')
+        self.mox.StubOutWithMock(db, 'compute_node_get_all')
+        self.mox.StubOutWithMock(logging, 'warn')
+        self.mox.StubOutWithMock(db, 'instance_get_all')
+
+        utils.utcnow().AndReturn(datetime.datetime.fromtimestamp(3000))
+        db.compute_node_get_all(context).AndReturn(fakes.COMPUTE_NODES)
+        logging.warn("No service for compute ID 5")
+        db.instance_get_all(context).AndReturn(fakes.INSTANCES)
+        # Within the ttl, so no db calls
+        utils.utcnow().AndReturn(datetime.datetime.fromtimestamp(3004))
+        # Expired, so read again
+        utils.utcnow().AndReturn(datetime.datetime.fromtimestamp(3005))
+        db.compute_node_get_all(context).AndReturn(fakes.COMPUTE_NODES)
+        logging.warn("No service for compute ID 5")
+        db.instance_get_all(context).AndReturn(fakes.INSTANCES)
+
+        def _instance(memory_mb):
+            return dict(memory_mb=memory_mb, root_gb=0, ephemeral_gb=0,
+                        vcpus=1)
+
+        self.mox.ReplayAll()
+        host_states1 = self.host_manager.get_all_host_states(context, topic)
+        self.assertEqual(host_states1['host2'].free_ram_mb, 512)
+        # Consuming from the returned copy is not carried over ...
+        host_states1['host2'].consume_from_instance(_instance(256))
+        # ... only instances really placed on the host are.
+        self.host_manager.consume_cached_host_state(topic, 'host2',
+                _instance(128))
+        host_states2 = self.host_manager.get_all_host_states(context, topic)
+        host_states3 = self.host_manager.get_all_host_states(context, topic)
+        self.mox.VerifyAll()
+
+        self.assertEqual(host_states1['host2'].free_ram_mb, 256)
+        self.assertEqual(host_states2['host2'].free_ram_mb, 384)
+        self.assertEqual(host_states2['host1'].free_ram_mb, 0)
+        # Re-read from the db once the ttl expired
+        self.assertEqual(host_states3['host2'].free_ram_mb, 512)
+
 
 class HostStateTestCase(test.TestCase):
     """Test case for HostState class"""
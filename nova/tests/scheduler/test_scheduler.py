@@ -22,6 +22,9 @@ Tests For Scheduler
 import datetime
 import json
 
+import eventlet
+from novaclient import v1_1 as novaclient
+
 from nova.compute import api as compute_api
 from nova.compute import power_state
 from nova.compute import vm_states
@@ -31,6 +34,7 @@ from nova import exception
 from nova import flags
 from nova import rpc
 from nova.rpc import common as rpc_common
+from nova.scheduler import api as scheduler_api
 from nova.scheduler import driver
 from nova.scheduler import manager
 from nova import test
@@ -1168,3 +1172,52 @@ class SchedulerDriverModuleTestCase(test.TestCase):
         self.assertDictMatch(result, expected)
         # Orig dict not changed
         self.assertNotEqual(result, instance)
+
+
+class SchedulerApiCallZoneMethodTestCase(test.TestCase):
+    """Test case for scheduler api call_zone_method()."""
+
+    class FakeZone(object):
+        def __init__(self, id, delay):
+            self.id = id
+            self.name = 'zone%d' % id
+            self.api_url = 'http://zone%d' % id
+            self.username = 'user'
+            self.password = 'pass'
+            self.delay = delay
+
+    def setUp(self):
+        super(SchedulerApiCallZoneMethodTestCase, self).setUp()
+        self.context = context.RequestContext('fake_user', 'fake_project')
+
+        test_case = self
+
+        class FakeNovaClient(object):
+            def __init__(self, username, password, project, api_url,
+                         region_name=None, token=None):
+                self.zones = self
+                self.region_name = region_name
+
+            def authenticate(self):
+                pass
+
+            def select(self, specs=None):
+                for zone in test_case.zones:
+                    if zone.name == self.region_name:
+                        eventlet.sleep(zone.delay)
+                        return zone.name
+
+        self.stubs.Set(novaclient, 'Client', FakeNovaClient)
+
+    def test_call_zone_method(self):
+        self.zones = [self.FakeZone(1, 0), self.FakeZone(2, 0)]
+        result = scheduler_api.call_zone_method(self.context, 'select',
+                specs={}, zones=self.zones)
+        self.assertEqual(result, [(1, 'zone1'), (2, 'zone2')])
+
+    def test_call_zone_method_skips_slow_zone(self):
+        self.flags(zone_call_timeout=1)
+        self.zones = [self.FakeZone(1, 0), self.FakeZone(2, 5)]
+        result = scheduler_api.call_zone_method(self.context, 'select',
+                specs={}, zones=self.zones)
+        self.assertEqual(result, [(1, 'zone1')])
@@ -1,4 +1,9 @@
 import cStringIO
+import os
+import sys
+import tempfile
+
+from eventlet import greenthread
 
 from nova import context
 from nova import flags
@@ -77,6 +82,54 @@ class LogHandlerTestCase(test.TestCase):
                          '/some/path/foo-bar.log')
 
 
+class BufferedWatchedFileHandlerTestCase(test.TestCase):
+    def setUp(self):
+        super(BufferedWatchedFileHandlerTestCase, self).setUp()
+        self.flags(logging_default_format_string="%(message)s")
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.handler = log.BufferedWatchedFileHandler(self.path, 3, 60)
+        self.log = log.getLogger('nova-buffered-test')
+        self.log.addHandler(self.handler)
+
+    def tearDown(self):
+        self.log.removeHandler(self.handler)
+        self.handler.close()
+        os.unlink(self.path)
+        super(BufferedWatchedFileHandlerTestCase, self).tearDown()
+
+    def _contents(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_writes_when_buffer_is_full(self):
+        self.log.info("one")
+        self.log.info("two")
+        self.assertEqual("", self._contents())
+        self.log.info("three")
+        self.assertEqual("one\ntwo\nthree\n", self._contents())
+
+    def test_writes_errors_immediately(self):
+        self.log.info("one")
+        self.log.error("two")
+        self.assertEqual("one\ntwo\n", self._contents())
+
+    def test_writes_pending_records_after_interval(self):
+        self.log.removeHandler(self.handler)
+        self.handler.close()
+        self.handler = log.BufferedWatchedFileHandler(self.path, 3, 0.1)
+        self.log.addHandler(self.handler)
+        self.log.info("one")
+        self.assertEqual("", self._contents())
+        greenthread.sleep(0.3)
+        self.assertEqual("one\n", self._contents())
+
+    def test_close_writes_pending_records(self):
+        self.log.info("one")
+        self.handler.close()
+        self.assertEqual("one\n", self._contents())
+
+
 class NovaFormatterTestCase(test.TestCase):
     def setUp(self):
         super(NovaFormatterTestCase, self).setUp()
@@ -106,10 +159,61 @@ class NovaFormatterTestCase(test.TestCase):
         expected = "HAS CONTEXT [%s]: bar\n" % ctxt.request_id
         self.assertEqual(expected, self.stream.getvalue())
 
+    def test_instance_log(self):
+        self.flags(logging_default_format_string="%(instance)s%(message)s")
+        self.log.info("foo", instance={'uuid': 'fake-uuid'})
+        self.assertEqual("[instance: fake-uuid] foo\n",
+                         self.stream.getvalue())
+
+    def test_instance_log_follows_changed_format(self):
+        self.flags(logging_default_format_string="%(instance)s%(message)s")
+        self.log.info("foo", instance={'uuid': 'fake-uuid'})
+        self.flags(instance_format="<%(uuid)s> ")
+        self.log.info("bar", instance={'uuid': 'fake-uuid'})
+        self.assertEqual("[instance: fake-uuid] foo\n<fake-uuid> bar\n",
+                         self.stream.getvalue())
+
     def test_debugging_log(self):
         self.log.debug("baz")
         self.assertEqual("NOCTXT: baz --DBG\n", self.stream.getvalue())
 
+    def test_format_does_not_modify_formatter(self):
+        fmt = log._formatter._fmt
+        self.log.debug("baz")
+        self.assertEqual(fmt, log._formatter._fmt)
+
+    def test_exception_is_formatted_once(self):
+        calls = []
+        orig = log._formatter.formatException
+
+        def fake_format_exception(exc_info, record=None):
+            calls.append(exc_info)
+            return orig(exc_info, record)
+
+        self.stubs.Set(log._formatter, 'formatException',
+                       fake_format_exception)
+        try:
+            raise Exception("qux")
+        except Exception:
+            record = self.log.makeRecord(self.log.name, log.ERROR, 'fn', 1,
+                                         'quux', (), sys.exc_info())
+        log._formatter.format(record)
+        log._formatter.format(record)
+        self.assertEqual(1, len(calls))
+
+    def test_exception_lines_are_prefixed(self):
+        self.flags(logging_exception_prefix="TRACE %(name)s: ")
+        try:
+            raise Exception("qux")
+        except Exception:
+            self.log.exception("quux")
+        lines = self.stream.getvalue().split('\n')
+        self.assertEqual("NOCTXT: quux", lines[0])
+        self.assertEqual("", lines[-1])
+        for line in lines[1:-1]:
+            self.assert_(line.startswith("TRACE nova: "))
+        self.assertEqual("TRACE nova: Exception: qux", lines[-2])
+
 
 class NovaLoggerTestCase(test.TestCase):
     def setUp(self):
@@ -126,3 +230,57 @@ class NovaLoggerTestCase(test.TestCase):
     def test_child_log_has_level_of_parent_flag(self):
         l = log.getLogger('nova-test.foo')
         self.assertEqual(log.AUDIT, l.level)
+
+    def test_disabled_level_skips_update_extra(self):
+        def fake_update_extra(params):
+            self.fail('_update_extra called for a disabled level')
+
+        self.stubs.Set(self.log, '_update_extra', fake_update_extra)
+        self.log.debug("foo")
+        self.log.info("foo")
+
+    def test_level_follows_changed_flags(self):
+        self.flags(default_log_levels=["nova-test=DEBUG"])
+        l = log.getLogger('nova-test.bar')
+        self.assertEqual(log.DEBUG, l.level)
+
+    def test_record_message_is_only_interpolated_once(self):
+        calls = []
+
+        class Arg(object):
+            def __str__(self):
+                calls.append(1)
+                return 'arg'
+
+        record = self.log.makeRecord(self.log.name, log.INFO, 'fn', 1,
+                                     'foo %s', (Arg(),), None)
+        self.assertEqual('foo arg', record.getMessage())
+        self.assertEqual('foo arg', record.getMessage())
+        self.assertEqual(1, len(calls))
+
+
+class WritableLoggerTestCase(test.TestCase):
+    def setUp(self):
+        super(WritableLoggerTestCase, self).setUp()
+        self.records = []
+
+        class FakeLogger(object):
+            def log(inner_self, level, msg):
+                self.records.append((level, msg))
+
+        self.writable = log.WritableLogger(FakeLogger())
+
+    def test_logs_one_record_per_line(self):
+        self.writable.write("foo\nbar\n")
+        self.assertEqual([(log.INFO, "foo"), (log.INFO, "bar")],
+                         self.records)
+
+    def test_buffers_partial_lines(self):
+        self.writable.write("foo")
+        self.writable.write("bar")
+        self.assertEqual([], self.records)
+        self.writable.write("\nbaz")
+        self.assertEqual([(log.INFO, "foobar")], self.records)
+        self.writable.flush()
+        self.assertEqual([(log.INFO, "foobar"), (log.INFO, "baz")],
+                         self.records)
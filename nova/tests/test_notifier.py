@@ -110,13 +110,106 @@ class NotifierTestCase(test.TestCase):
             msgs.append(data)
 
         self.stubs.Set(nova.rpc, 'notify', mock_notify)
-        LOG.error('foo')
+        try:
+            LOG.error('foo')
+        finally:
+            for handler in LOG.handlers[:]:
+                if isinstance(handler, log.PublishErrorsHandler):
+                    LOG.removeHandler(handler)
         self.assertEqual(1, len(msgs))
         msg = msgs[0]
         self.assertEqual(msg['event_type'], 'error_notification')
         self.assertEqual(msg['priority'], 'ERROR')
         self.assertEqual(msg['payload']['error'], 'foo')
 
+    def test_batched_error_notification(self):
+        self.stubs.Set(nova.flags.FLAGS, 'notification_driver',
+            'nova.notifier.rabbit_notifier')
+        self.flags(publish_errors=True, publish_errors_batch_size=2)
+        handler = log.PublishErrorsHandler(log.ERROR)
+        LOG = log.getLogger('nova-publish-test')
+        LOG.addHandler(handler)
+        msgs = []
+
+        def mock_notify(context, topic, data):
+            msgs.append(data)
+
+        self.stubs.Set(nova.rpc, 'notify', mock_notify)
+        try:
+            LOG.error('foo')
+            self.assertEqual(0, len(msgs))
+            LOG.error('bar')
+        finally:
+            LOG.removeHandler(handler)
+            handler.close()
+        self.assertEqual(1, len(msgs))
+        msg = msgs[0]
+        self.assertEqual(msg['event_type'], 'error_notification')
+        self.assertEqual(msg['priority'], 'ERROR')
+        errors = [e['error'] for e in msg['payload']['errors']]
+        self.assertEqual(['foo', 'bar'], errors)
+
+    def test_error_notification_formats_args(self):
+        self.stubs.Set(nova.flags.FLAGS, 'notification_driver',
+            'nova.notifier.rabbit_notifier')
+        handler = log.PublishErrorsHandler(log.ERROR)
+        LOG = log.getLogger('nova-publish-test')
+        LOG.addHandler(handler)
+        LOG.propagate = False
+        msgs = []
+
+        def mock_notify(context, topic, data):
+            msgs.append(data)
+
+        self.stubs.Set(nova.rpc, 'notify', mock_notify)
+        try:
+            LOG.error('foo %s', 'bar')
+            self.flags(publish_errors_batch_size=2)
+            LOG.error('foo %(a)s', {'a': 'baz'})
+            LOG.error('foo %s', 'qux')
+        finally:
+            LOG.propagate = True
+            LOG.removeHandler(handler)
+            handler.close()
+        self.assertEqual(2, len(msgs))
+        self.assertEqual(msgs[0]['payload']['error'], 'foo bar')
+        errors = [e['error'] for e in msgs[1]['payload']['errors']]
+        self.assertEqual(['foo baz', 'foo qux'], errors)
+
+    def test_full_batch_cancels_timer(self):
+        self.stubs.Set(nova.flags.FLAGS, 'notification_driver',
+            'nova.notifier.rabbit_notifier')
+        self.flags(publish_errors=True, publish_errors_batch_size=2)
+        timers = []
+
+        class FakeTimer(object):
+            cancelled = False
+
+            def cancel(self):
+                self.cancelled = True
+
+        def fake_call_later(seconds, func):
+            timers.append(FakeTimer())
+            return timers[-1]
+
+        self.stubs.Set(log, '_call_later', fake_call_later)
+        self.stubs.Set(nova.rpc, 'notify', lambda *args: None)
+        handler = log.PublishErrorsHandler(log.ERROR)
+        LOG = log.getLogger('nova-publish-test')
+        LOG.addHandler(handler)
+        # Keep the records away from any handlers left on the nova logger
+        LOG.propagate = False
+        try:
+            LOG.error('foo')
+            LOG.error('bar')
+            LOG.error('baz')
+        finally:
+            LOG.propagate = True
+            LOG.removeHandler(handler)
+            handler.close()
+        self.assertEqual(2, len(timers))
+        self.assertTrue(timers[0].cancelled)
+
     def test_send_notification_by_decorator(self):
         self.notify_called = False
 
@@ -33,6 +33,7 @@ class RootwrapTestCase(test.TestCase):
             filters.CommandFilter("/nonexistant/cat", "root"),
             filters.CommandFilter("/bin/cat", "root")  # Keep this one last
             ]
+        self.index = wrapper.build_filter_index(self.filters)
 
     def tearDown(self):
         super(RootwrapTestCase, self).tearDown()
@@ -49,6 +50,10 @@ class RootwrapTestCase(test.TestCase):
         filtermatch = wrapper.match_filter(self.filters, usercmd)
         self.assertTrue(filtermatch is None)
 
+    def test_RegExpFilter_badly_formed(self):
+        f = filters.RegExpFilter("/bin/ls", "root", 'ls', '[a-z')
+        self.assertFalse(f.match(["ls", "a"]))
+
     def test_missing_command(self):
         usercmd = ["foo_bar_not_exist"]
         filtermatch = wrapper.match_filter(self.filters, usercmd)
@@ -63,17 +68,40 @@ class RootwrapTestCase(test.TestCase):
         self.assertEqual(env.get('FLAGFILE'), 'A')
         self.assertEqual(env.get('NETWORK_ID'), 'foobar')
 
+    def test_DnsmasqFilter_env_value_with_equals(self):
+        usercmd = ['FLAGFILE=/etc/a=b', 'NETWORK_ID=foobar', 'dnsmasq']
+        f = filters.DnsmasqFilter("/usr/bin/dnsmasq", "root")
+        env = f.get_environment(usercmd)
+        self.assertEqual(env.get('FLAGFILE'), '/etc/a=b')
+
+    def test_DnsmasqFilter_env_names_are_fixed(self):
+        usercmd = ['NOVA_ROOTWRAP_TEST=A', 'NETWORK_ID=foobar', 'dnsmasq']
+        f = filters.DnsmasqFilter("/usr/bin/dnsmasq", "root")
+        env = f.get_environment(usercmd)
+        self.assertFalse('NOVA_ROOTWRAP_TEST' in env)
+        self.assertEqual(env.get('FLAGFILE'), 'A')
+
     @test.skip_if(not os.path.exists("/proc/%d" % os.getpid()),
                   "Test requires /proc filesystem (procfs)")
     def test_KillFilter(self):
+        # KillFilter checks the executable behind the PID,
+        # so the target has to actually exec /bin/sleep.  Make sure it
+        # is reaped so it does not outlive the test.
         p = subprocess.Popen(["/bin/sleep", "5"])
+        try:
+            self._test_KillFilter(p.pid)
+        finally:
+            p.kill()
+            p.wait()
+
+    def _test_KillFilter(self, pid):
         f = filters.KillFilter("/bin/kill", "root",
                                ["-ALRM"],
                                ["/bin/sleep"])
-        usercmd = ['kill', '-9', p.pid]
+        usercmd = ['kill', '-9', pid]
         # Incorrect signal should fail
         self.assertFalse(f.match(usercmd))
-        usercmd = ['kill', p.pid]
+        usercmd = ['kill', pid]
         # Providing no signal should fail
         self.assertFalse(f.match(usercmd))
 
@@ -86,10 +114,10 @@ class RootwrapTestCase(test.TestCase):
         usercmd = ['kill', '-9', 999999]
         # Nonexistant PID should fail
         self.assertFalse(f.match(usercmd))
-        usercmd = ['kill', p.pid]
+        usercmd = ['kill', pid]
         # Providing no signal should work
         self.assertTrue(f.match(usercmd))
-        usercmd = ['kill', '-9', p.pid]
+        usercmd = ['kill', '-9', pid]
         # Providing -9 signal should work
         self.assertTrue(f.match(usercmd))
 
@@ -98,3 +126,10 @@ class RootwrapTestCase(test.TestCase):
         usercmd = ["cat", "/"]
         filtermatch = wrapper.match_filter(self.filters, usercmd)
         self.assertTrue(filtermatch is self.filters[-1])
+
+    def test_filter_index(self):
+        for usercmd in (["ls", "/root"], ["ls", "root"], ["cat", "/"],
+                        ["cat", "/root"], ["foo_bar_not_exist"]):
+            self.assertTrue(
+                wrapper.match_filter(self.filters, usercmd, self.index) is
+                wrapper.match_filter(self.filters, usercmd))
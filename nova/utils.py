@@ -810,23 +810,23 @@ def synchronized(name, external=False):
                 _semaphores[name] = semaphore.Semaphore()
             sem = _semaphores[name]
             LOG.debug(_('Attempting to grab semaphore "%(lock)s" for method '
-                        '"%(method)s"...' % {'lock': name,
-                                             'method': f.__name__}))
+                        '"%(method)s"...'), {'lock': name,
+                                             'method': f.__name__})
             with sem:
                 LOG.debug(_('Got semaphore "%(lock)s" for method '
-                            '"%(method)s"...' % {'lock': name,
-                                                 'method': f.__name__}))
+                            '"%(method)s"...'), {'lock': name,
+                                                 'method': f.__name__})
                 if external and not FLAGS.disable_process_locking:
                     LOG.debug(_('Attempting to grab file lock "%(lock)s" for '
-                                'method "%(method)s"...' %
-                                {'lock': name, 'method': f.__name__}))
+                                'method "%(method)s"...'),
+                              {'lock': name, 'method': f.__name__})
                     lock_file_path = os.path.join(FLAGS.lock_path,
                                                   'nova-%s' % name)
                     lock = lockfile.FileLock(lock_file_path)
                     with lock:
                         LOG.debug(_('Got file lock "%(lock)s" for '
-                                    'method "%(method)s"...' %
-                                    {'lock': name, 'method': f.__name__}))
+                                    'method "%(method)s"...'),
+                                  {'lock': name, 'method': f.__name__})
                         retval = f(*args, **kwargs)
                 else:
                     retval = f(*args, **kwargs)
@@ -965,7 +965,7 @@ def parse_server_string(server_str):
         return (address, port)
 
     except Exception:
-        LOG.debug(_('Invalid server_string: %s' % server_str))
+        LOG.debug(_('Invalid server_string: %s'), server_str)
         return ('', '')
 
 
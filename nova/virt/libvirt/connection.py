@@ -1095,8 +1095,8 @@ class LibvirtConnection(driver.ComputeDriver):
             for injection in ('metadata', 'key', 'net'):
                 if locals()[injection]:
                     LOG.info(_('instance %(inst_name)s: injecting '
-                               '%(injection)s into image %(img_id)s'
-                               % locals()))
+                               '%(injection)s into image %(img_id)s'),
+                             locals())
             try:
                 disk.inject_data(injection_path, key, net, metadata,
                                  partition=target_partition,
@@ -1647,7 +1647,7 @@ class LibvirtConnection(driver.ComputeDriver):
         LOG.info(_('Instance launched has CPU info:\n%s') % cpu_info)
         dic = utils.loads(cpu_info)
         xml = str(Template(self.cpuinfo_xml, searchList=dic))
-        LOG.info(_('to xml...\n:%s ' % xml))
+        LOG.info(_('to xml...\n:%s '), xml)
 
         u = "http://libvirt.org/html/libvirt-libvirt.html#virCPUCompareResult"
         m = _("CPU doesn't have compatibility.\n\n%(ret)s\n\nRefer to %(u)s")
@@ -146,6 +146,28 @@ def nova_import_module_only(logical_line):
 
     # TODO(jogo) handle "from x import *"
 
+
+LOG_INTERPOLATION_RE = re.compile(r"\b(LOG|logging)\.(audit|debug|info|warn|"
+                                  r"warning|error|critical|exception)\("
+                                  r"_\((['\"])[^)]*?\3\s*%")
+
+
+def nova_log_interpolation(logical_line):
+    """
+    nova HACKING guide recommends deferring log message interpolation:
+    Do not interpolate inside _() in a log call, pass the values as
+    arguments to the logger instead
+
+    Examples:
+    BAD: LOG.debug(_("Deleting image %s" % image_id))
+    GOOD: LOG.debug(_("Deleting image %s"), image_id)
+    N601
+    """
+    match = LOG_INTERPOLATION_RE.search(logical_line)
+    if match:
+        return match.start(), ("NOVA N601: pass log message arguments to "
+                               "the logger instead of interpolating them")
+
 #TODO(jogo) Dict and list objects
 
 current_file = ""